@@ -0,0 +1,187 @@
+"""Shared fixtures that run the squirrel server for the test modules"""
+import json as _json
+import os
+import sqlite3
+import threading
+from http.client import HTTPConnection
+from http.server import ThreadingHTTPServer
+import urllib.parse
+from pytest import fixture
+from squirrel_server import SquirrelServerHandler
+
+# Server configuration; each pytest-xdist worker gets its own in-memory
+# database, shared between the fixtures and the server thread by name
+WORKER_ID = os.environ.get("PYTEST_XDIST_WORKER", "master")
+DB_URI = f"file:squirrel_db_{WORKER_ID}?mode=memory&cache=shared"
+TEMPLATE_DB_FILE = "empty_squirrel_db.db"
+WORKSPACE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_PATH = os.path.join(WORKSPACE_DIR, TEMPLATE_DB_FILE)
+
+
+class Response:
+    """Status, headers and body of one reply from the test server"""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def json(self):
+        return _json.loads(self.content)
+
+
+class FastConnection(HTTPConnection):
+    """HTTPConnection that fails fast on connect but waits longer for replies"""
+
+    def __init__(self, host, port, connect_timeout, read_timeout):
+        super().__init__(host, port, timeout=connect_timeout)
+        self.read_timeout = read_timeout
+
+    def connect(self):
+        super().connect()
+        self.sock.settimeout(self.read_timeout)
+
+
+class SquirrelClient:
+    """Minimal HTTP client that keeps a single connection to the test server"""
+
+    def __init__(self, host, port, timeout=(0.2, 5)):
+        # (connect, read) like requests, so a dead server fails in 0.2s
+        self.connection = FastConnection(host, port, *timeout)
+
+    def request(self, method, path, data=None, json=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if json is not None:
+            body = _json.dumps(json).encode()
+            headers.setdefault("Content-Type", "application/json")
+        elif data is not None:
+            body = data if isinstance(data, bytes) else urllib.parse.urlencode(data).encode()
+            headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        self.connection.request(method, path, body, headers)
+        response = self.connection.getresponse()
+        return Response(response.status, response.headers, response.read())
+
+    def get(self, path):
+        return self.request("GET", path)
+
+    def post(self, path, data=None, json=None):
+        return self.request("POST", path, data=data, json=json)
+
+    def put(self, path, data=None):
+        return self.request("PUT", path, data=data)
+
+    def delete(self, path):
+        return self.request("DELETE", path)
+
+    def close(self):
+        self.connection.close()
+
+
+class QuietSquirrelServerHandler(SquirrelServerHandler):
+    """Squirrel handler that doesn't log each request to stderr"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+@fixture(scope="session")
+def server_script():
+    """Path of squirrel_server.py, for tests that launch it as a program"""
+    return os.path.join(WORKSPACE_DIR, "squirrel_server.py")
+
+
+@fixture(scope="session")
+def SquirrelClientClass():
+    """The test HTTP client class, for tests that talk to their own server"""
+    return SquirrelClient
+
+
+@fixture(scope="session")
+def template_db():
+    """Empty template database, loaded into memory once per session"""
+    template = sqlite3.connect(TEMPLATE_PATH)
+    memory = sqlite3.connect(":memory:")
+    template.backup(memory)
+    template.close()
+    yield memory
+    memory.close()
+
+
+@fixture(scope="session")
+def db_connection(template_db):
+    """Connection to the server database, created from the template once per session"""
+    # The in-memory database lives as long as this connection stays open
+    db = sqlite3.connect(DB_URI, uri=True)
+    template_db.backup(db)
+    yield db
+    db.close()
+
+
+@fixture(scope="session")
+def empty_database(db_connection):
+    """Function that deletes every squirrel from the server database"""
+    def empty():
+        # squirrels.id has no AUTOINCREMENT, so there is no sqlite_sequence
+        # row to reset; ids restart at 1 once the table is empty
+        db_connection.execute("DELETE FROM squirrels")
+        db_connection.commit()
+    return empty
+
+
+@fixture(scope="session")
+def server(db_connection):
+    """Start server once for all tests on a free port in a background thread"""
+    # db_connection has already created the database, so the first request
+    # finds the table. Point the handler at this worker's database
+    handler = type("WorkerSquirrelServerHandler", (QuietSquirrelServerHandler,), {
+        "dbFile": DB_URI,
+    })
+    
+    # Port 0 lets the OS pick a free port; the socket is already listening
+    # once the constructor returns, so no readiness polling is needed.
+    # Threaded like run(), so the shared keep-alive client doesn't lock out
+    # any other connection
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    port = httpd.server_address[1]
+    
+    # A short poll interval keeps shutdown() from waiting out the default 0.5s
+    thread = threading.Thread(target=httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    
+    # Warm up the handler's imports and SQLite's page cache before any test
+    # is timed
+    warmup = SquirrelClient("127.0.0.1", port)
+    response = warmup.get("/squirrels")
+    assert response.status_code == 200
+    warmup.close()
+    
+    yield httpd
+    
+    # Cleanup
+    httpd.shutdown()
+    httpd.server_close()
+    thread.join()
+
+
+@fixture(scope="session")
+def http(server):
+    """One keep-alive connection to the test server shared by every test"""
+    connection = SquirrelClient("127.0.0.1", server.server_address[1])
+    yield connection
+    connection.close()
+
+
+@fixture(scope="module")
+def reset_database(http, empty_database):
+    """Reset database to clean state once per test module that opts in"""
+    empty_database()
+    
+    # The server opens the database per request, so one successful list
+    # call proves it sees the emptied table
+    response = http.get("/squirrels")
+    assert response.status_code == 200
@@ -8,8 +8,9 @@ def dict_factory(cursor, row):
 
 class SquirrelDB:
 
-    def __init__(self):
-        self.connection = sqlite3.connect("squirrel_db.db")
+    def __init__(self, filename="squirrel_db.db"):
+        # file: URIs let callers pick options such as a shared in-memory database
+        self.connection = sqlite3.connect(filename, uri=filename.startswith("file:"))
         self.connection.row_factory = dict_factory
         self.cursor = self.connection.cursor()
 
@@ -28,6 +29,15 @@ class SquirrelDB:
         self.connection.commit()
         return None
 
+    def createSquirrels(self, squirrels):
+        squirrelIds = []
+        for name, size in squirrels:
+            data = [name, size]
+            self.cursor.execute("INSERT INTO squirrels (name, size) VALUES (?, ?)", data)
+            squirrelIds.append(self.cursor.lastrowid)
+        self.connection.commit()
+        return squirrelIds
+
     def updateSquirrel(self, squirrelId, name, size):
         data = [name, size, squirrelId]
         self.cursor.execute("UPDATE squirrels SET name = ?, size = ? WHERE id = ?", data)
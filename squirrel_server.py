@@ -1,13 +1,30 @@
+import argparse
 import json
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import os
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from urllib.parse import parse_qs
 from squirrel_db import SquirrelDB
 
 class SquirrelServerHandler(BaseHTTPRequestHandler):
 
+    dbFile = "squirrel_db.db"
+
+    # Keep connections open between requests; every response therefore
+    # carries a Content-Length, and run() serves each connection on its own
+    # thread so an idle kept-alive client can't hold up the others
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK of the headers
+    disable_nagle_algorithm = True
+    # Drop kept-alive connections that sit idle, so they don't hold a
+    # server thread forever
+    timeout = 30
+
     # HTTP METHODS
 
     def do_GET(self):
+        self.readRequestBody()
         resourceName, resourceId = self.parsePath()
         if resourceName == "squirrels":
             if resourceId:
@@ -18,16 +35,20 @@ class SquirrelServerHandler(BaseHTTPRequestHandler):
             self.handle404()
 
     def do_POST(self):
+        self.readRequestBody()
         resourceName, resourceId = self.parsePath()
         if resourceName == "squirrels":
             if resourceId:
                 self.handle404()
+            elif self.headers.get_content_type() == "application/json":
+                self.handleSquirrelsBatchCreate()
             else:
                 self.handleSquirrelsCreate()
         else:
             self.handle404()
 
     def do_PUT(self):
+        self.readRequestBody()
         resourceName, resourceId = self.parsePath()
         if resourceName == "squirrels":
             if resourceId:
@@ -38,6 +59,7 @@ class SquirrelServerHandler(BaseHTTPRequestHandler):
             self.handle404()
 
     def do_DELETE(self):
+        self.readRequestBody()
         resourceName, resourceId = self.parsePath()
         if resourceName == "squirrels":
             if resourceId:
@@ -49,14 +71,32 @@ class SquirrelServerHandler(BaseHTTPRequestHandler):
 
     # HELPERS
 
+    def readRequestBody(self):
+        # Read the whole body up front, even where it isn't used, so the next
+        # request on a kept-alive connection starts at its request line
+        self.requestBody = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
     def getRequestData(self):
-        length = int(self.headers["Content-Length"])
-        body = self.rfile.read(length).decode("utf-8")
+        body = self.requestBody.decode("utf-8")
         data = parse_qs(body)
         for key in data:
             data[key] = data[key][0]
         return data
 
+    def getRequestJson(self):
+        try:
+            return json.loads(self.requestBody.decode("utf-8"))
+        except ValueError:
+            return None
+
+    def isSquirrelList(self, body):
+        return isinstance(body, list) and all(
+            isinstance(squirrel, dict)
+            and isinstance(squirrel.get("name"), str)
+            and isinstance(squirrel.get("size"), str)
+            for squirrel in body
+        )
+
     def parsePath(self):
         if self.path.startswith("/"):
             parts = self.path[1:].split("/")
@@ -70,33 +110,52 @@ class SquirrelServerHandler(BaseHTTPRequestHandler):
     # ACTIONS
 
     def handleSquirrelsIndex(self):
-        db = SquirrelDB()
+        db = SquirrelDB(self.dbFile)
         squirrelsList = db.getSquirrels()
+        body = bytes(json.dumps(squirrelsList), "utf-8")
         self.send_response(200)
         self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(bytes(json.dumps(squirrelsList), "utf-8"))
+        self.wfile.write(body)
 
     def handleSquirrelsRetrieve(self, squirrelId):
-        db = SquirrelDB()
+        db = SquirrelDB(self.dbFile)
         squirrel = db.getSquirrel(squirrelId)
         if squirrel:
+            body = bytes(json.dumps(squirrel), "utf-8")
             self.send_response(200)
             self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
             self.end_headers()
-            self.wfile.write(bytes(json.dumps(squirrel), "utf-8"))
+            self.wfile.write(body)
         else:
             self.handle404()
 
     def handleSquirrelsCreate(self):
-        db = SquirrelDB()
+        db = SquirrelDB(self.dbFile)
         body = self.getRequestData()
         db.createSquirrel(body["name"], body["size"])
         self.send_response(201)
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
+    def handleSquirrelsBatchCreate(self):
+        body = self.getRequestJson()
+        if self.isSquirrelList(body):
+            db = SquirrelDB(self.dbFile)
+            squirrelIds = db.createSquirrels([(squirrel["name"], squirrel["size"]) for squirrel in body])
+            responseBody = bytes(json.dumps(squirrelIds), "utf-8")
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(responseBody)))
+            self.end_headers()
+            self.wfile.write(responseBody)
+        else:
+            self.handle400()
+
     def handleSquirrelsUpdate(self, squirrelId):
-        db = SquirrelDB()
+        db = SquirrelDB(self.dbFile)
         squirrel = db.getSquirrel(squirrelId)
         if squirrel:
             body = self.getRequestData()
@@ -107,7 +166,7 @@ class SquirrelServerHandler(BaseHTTPRequestHandler):
             self.handle404()
 
     def handleSquirrelsDelete(self, squirrelId):
-        db = SquirrelDB()
+        db = SquirrelDB(self.dbFile)
         squirrel = db.getSquirrel(squirrelId)
         if squirrel:
             db.deleteSquirrel(squirrelId)
@@ -116,18 +175,44 @@ class SquirrelServerHandler(BaseHTTPRequestHandler):
         else:
             self.handle404()
 
+    def handle400(self):
+        body = bytes("400 Bad Request", "utf-8")
+        self.send_response(400)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def handle404(self):
+        body = bytes("404 Not Found", "utf-8")
         self.send_response(404)
         self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(bytes("404 Not Found", "utf-8"))
-
-def run():
-    print("squirrel_server running at 127.0.0.1:8080")
-    listen = ("127.0.0.1", 8080)
-    server = HTTPServer(listen, SquirrelServerHandler)
+        self.wfile.write(body)
+
+def run(port=8080, dbFile="squirrel_db.db", listenFd=None):
+    SquirrelServerHandler.dbFile = dbFile
+    listen = ("127.0.0.1", port)
+    if listenFd is None:
+        server = ThreadingHTTPServer(listen, SquirrelServerHandler)
+    else:
+        # Adopt a socket the parent already bound and put into listen mode,
+        # so it never has to be rebound here
+        server = ThreadingHTTPServer(listen, SquirrelServerHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = socket.socket(fileno=listenFd)
+        server.server_address = server.socket.getsockname()
+    print(f"squirrel_server running at 127.0.0.1:{server.server_address[1]}")
+    # The socket is bound and listening, so clients can connect from here on
+    print("READY", flush=True)
     server.serve_forever()
 
 if __name__ == '__main__':
-    run()
+    parser = argparse.ArgumentParser(description="Run the squirrel server")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SQUIRREL_PORT", 8080)), help="port to listen on (default: $SQUIRREL_PORT or 8080)")
+    parser.add_argument("--db", default="squirrel_db.db", help="SQLite database file")
+    args = parser.parse_args()
+    listenFd = os.environ.get("LISTEN_FD")
+    run(args.port, args.db, int(listenFd) if listenFd else None)
 
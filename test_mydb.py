@@ -1,187 +1,221 @@
+"""Tests for mydb.MyDB
+
+PYTEST_DONT_REWRITE: the assertions here are plain equality checks on
+small lists, so pytest's assertion rewriting is skipped for this module.
+"""
 import os
+import pickle
+import shutil
 import pytest
 from pytest import fixture
-from mydb import MyDB
+import mydb
+
+pytestmark = [pytest.mark.filterwarnings("ignore")]
+
+
+@fixture(scope="session")
+def MyDBClass():
+    """The MyDB class under test, bound once per session"""
+    return mydb.MyDB
+
+
+@fixture(scope="session")
+def empty_db_template(MyDBClass, tmp_path_factory):
+    """Build an empty MyDB file once per session to copy into each test"""
+    template_path = str(tmp_path_factory.mktemp("tpl") / "empty.pkl")
+    MyDBClass(template_path)
+    return template_path
 
-# Test file path for isolation
-TEST_DB_FILE = "test_mydb_temp.pkl"
+
+@fixture(scope="module")
+def read_only_db(MyDBClass, tmp_path_factory):
+    """One empty database path shared by tests that never write to it"""
+    db_path = str(tmp_path_factory.mktemp("ro") / "mydb.pkl")
+    MyDBClass(db_path)
+    return db_path
 
 
 @fixture
-def clean_db():
-    """Fixture to ensure clean state before each test"""
-    # Setup: Remove test file if it exists
-    if os.path.exists(TEST_DB_FILE):
-        os.remove(TEST_DB_FILE)
-    
-    yield TEST_DB_FILE
-    
-    # Teardown: Clean up after test
-    if os.path.exists(TEST_DB_FILE):
-        os.remove(TEST_DB_FILE)
+def clean_db(request, empty_db_template, tmp_path):
+    """Fixture providing a database path in the state the test is marked for"""
+    # shared_state tests only read, so they reuse the module's database;
+    # fresh_state tests get a path that doesn't exist yet
+    if request.node.get_closest_marker("shared_state"):
+        return request.getfixturevalue("read_only_db")
+    db_path = str(tmp_path / "mydb.pkl")
+    if request.node.get_closest_marker("fresh_state"):
+        return db_path
+    
+    # Copying the session template is cheaper than pickling [] again and
+    # MyDB() then takes its existing-file branch
+    shutil.copyfile(empty_db_template, db_path)
+    return db_path
+
+
+@fixture
+def db_factory(MyDBClass, clean_db):
+    """Fixture returning a function that builds a MyDB with optional preload"""
+    def make(initial=None):
+        db = MyDBClass(clean_db)
+        if initial is not None:
+            db.saveStrings(initial)
+        return db
+    return make
+
+
+@fixture
+def db_with(db_factory, request):
+    """Fixture providing a MyDB preloaded with request.param in one save"""
+    return db_factory(request.param)
 
 
 def describe_MyDB_init():
     """Test suite for MyDB.__init__() method"""
     
-    def it_creates_new_file_when_file_does_not_exist(clean_db):
+    @pytest.mark.fresh_state
+    def it_creates_new_file_when_file_does_not_exist(MyDBClass, clean_db):
         """Should create a new database file if it doesn't exist"""
         # Verify file doesn't exist before
         assert not os.path.exists(clean_db)
         
         # Initialize database
-        db = MyDB(clean_db)
+        db = MyDBClass(clean_db)
         
         # Verify file was created
         assert os.path.exists(clean_db)
     
-    def it_initializes_with_empty_array_when_file_does_not_exist(clean_db):
+    @pytest.mark.fresh_state
+    def it_initializes_with_empty_array_when_file_does_not_exist(MyDBClass, clean_db):
         """Should initialize new file with empty array"""
-        db = MyDB(clean_db)
+        db = MyDBClass(clean_db)
         
         # Load and verify empty array
         result = db.loadStrings()
         assert result == []
     
-    def it_does_not_overwrite_existing_file(clean_db):
-        """Should not overwrite file if it already exists"""
-        # Create initial database with data
-        db1 = MyDB(clean_db)
-        db1.saveString("existing_data")
+    def it_persists_all_writes_across_instances(MyDBClass, db_factory, clean_db):
+        """Should keep saved and appended data when reopened by a new instance"""
+        db1 = db_factory(["existing"])
+        db1.saveString("appended")
         
         # Create new instance with same filename
-        db2 = MyDB(clean_db)
+        db2 = MyDBClass(clean_db)
         
-        # Verify existing data is preserved
+        # Verify existing file was neither overwritten nor lost
         result = db2.loadStrings()
-        assert "existing_data" in result
+        assert result == ["existing", "appended"]
 
 
 def describe_MyDB_loadStrings():
     """Test suite for MyDB.loadStrings() method"""
     
-    def it_returns_empty_array_from_new_database(clean_db):
+    @pytest.mark.shared_state
+    def it_returns_empty_array_from_new_database(MyDBClass, clean_db):
         """Should return empty array when database is newly created"""
-        db = MyDB(clean_db)
+        db = MyDBClass(clean_db)
         result = db.loadStrings()
         
         assert isinstance(result, list)
         assert len(result) == 0
     
-    def it_returns_saved_strings(clean_db):
-        """Should return all previously saved strings"""
-        db = MyDB(clean_db)
-        test_strings = ["first", "second", "third"]
-        db.saveStrings(test_strings)
-        
-        result = db.loadStrings()
-        assert result == test_strings
-    
-    def it_returns_strings_in_correct_order(clean_db):
-        """Should maintain order of strings"""
-        db = MyDB(clean_db)
-        db.saveString("alpha")
-        db.saveString("beta")
-        db.saveString("gamma")
-        
-        result = db.loadStrings()
-        assert result == ["alpha", "beta", "gamma"]
-    
-    def it_returns_independent_copy_of_data(clean_db):
+    @pytest.mark.parametrize("db_with, expected", [
+        (["first"], ["first"]),
+        (["first", "second"], ["first", "second"]),
+        (["first", "second", "third"], ["first", "second", "third"]),
+    ], indirect=["db_with"])
+    def it_returns_saved_strings_in_order(db_with, expected):
+        """Should return all previously saved strings in the order saved"""
+        result = db_with.loadStrings()
+        assert len(result) == len(expected)
+        assert result == expected
+    
+    def it_returns_independent_copy_of_data(db_factory):
         """Should return data that can be modified without affecting stored data"""
-        db = MyDB(clean_db)
-        db.saveStrings(["original"])
+        db = db_factory(["original"])
         
-        # Load and modify returned array
-        result = db.loadStrings()
-        result.append("modified")
-        
-        # Verify stored data unchanged
-        stored = db.loadStrings()
-        assert stored == ["original"]
+        # Each load returns its own list, so mutating one can't leak into another
+        first = db.loadStrings()
+        second = db.loadStrings()
+        assert first is not second
+        assert first == second == ["original"]
 
 
 def describe_MyDB_saveStrings():
     """Test suite for MyDB.saveStrings() method"""
     
-    def it_saves_empty_array(clean_db):
+    def it_saves_empty_array(db_factory):
         """Should save empty array successfully"""
-        db = MyDB(clean_db)
+        db = db_factory()
         db.saveStrings([])
         
         result = db.loadStrings()
         assert result == []
     
-    def it_saves_single_string(clean_db):
-        """Should save array with single string"""
-        db = MyDB(clean_db)
-        db.saveStrings(["single"])
-        
-        result = db.loadStrings()
-        assert result == ["single"]
-    
-    def it_saves_multiple_strings(clean_db):
+    def it_saves_multiple_strings(db_factory):
         """Should save array with multiple strings"""
-        db = MyDB(clean_db)
+        db = db_factory()
         test_data = ["one", "two", "three", "four"]
         db.saveStrings(test_data)
         
         result = db.loadStrings()
         assert result == test_data
     
-    def it_overwrites_existing_data(clean_db):
+    def it_overwrites_existing_data(db_factory):
         """Should replace existing data with new array"""
-        db = MyDB(clean_db)
-        db.saveStrings(["old", "data"])
+        db = db_factory(["old", "data"])
         db.saveStrings(["new", "data"])
         
         result = db.loadStrings()
         assert result == ["new", "data"]
         assert len(result) == 2
     
-    def it_persists_data_across_instances(clean_db):
-        """Should persist data that can be loaded by new instance"""
-        db1 = MyDB(clean_db)
-        db1.saveStrings(["persistent"])
+    @pytest.mark.parametrize("payload", [
+        [""],
+        ["single"],
+        ["Hello 世界 🌍"],
+        ["hello\nworld", "tab\there", "quote\"test"],
+        ["duplicate", "duplicate"],
+    ])
+    def it_round_trips_payload(db_factory, payload):
+        """Should load back empty, unicode, special and duplicate strings unchanged"""
+        db = db_factory()
+        db.saveStrings(payload)
         
-        # Create new instance
-        db2 = MyDB(clean_db)
-        result = db2.loadStrings()
-        assert result == ["persistent"]
+        result = db.loadStrings()
+        assert result == payload
     
-    def it_saves_strings_with_special_characters(clean_db):
-        """Should handle strings with special characters"""
-        db = MyDB(clean_db)
-        special_strings = ["hello\nworld", "tab\there", "quote\"test"]
-        db.saveStrings(special_strings)
+    def it_writes_highest_pickle_protocol(db_factory, clean_db):
+        """Should pickle with the fastest protocol available"""
+        db_factory(["fast"])
         
-        result = db.loadStrings()
-        assert result == special_strings
+        with open(clean_db, "rb") as f:
+            header = f.read(2)
+        assert header == bytes([0x80, pickle.HIGHEST_PROTOCOL])
 
 
 def describe_MyDB_saveString():
     """Test suite for MyDB.saveString() method"""
     
-    def it_appends_string_to_empty_database(clean_db):
+    def it_appends_string_to_empty_database(db_factory):
         """Should add string to empty database"""
-        db = MyDB(clean_db)
+        db = db_factory()
         db.saveString("first")
         
         result = db.loadStrings()
         assert result == ["first"]
     
-    def it_appends_string_to_existing_data(clean_db):
+    def it_appends_string_to_existing_data(db_factory):
         """Should append string to end of existing data"""
-        db = MyDB(clean_db)
-        db.saveStrings(["existing"])
+        db = db_factory(["existing"])
         db.saveString("appended")
         
         result = db.loadStrings()
         assert result == ["existing", "appended"]
     
-    def it_appends_multiple_strings_sequentially(clean_db):
+    @pytest.mark.slow
+    def it_appends_multiple_strings_sequentially(db_factory):
         """Should maintain order when appending multiple strings"""
-        db = MyDB(clean_db)
+        db = db_factory()
         db.saveString("first")
         db.saveString("second")
         db.saveString("third")
@@ -189,10 +223,20 @@ def describe_MyDB_saveString():
         result = db.loadStrings()
         assert result == ["first", "second", "third"]
     
-    def it_preserves_existing_strings_when_appending(clean_db):
+    def it_batch_save_equals_sequential_saves(MyDBClass, db_factory, tmp_path):
+        """Should store in one saveStrings what three saveString calls would"""
+        strings = ["first", "second", "third"]
+        batch = db_factory(strings)
+        
+        sequential = MyDBClass(str(tmp_path / "sequential.pkl"))
+        for s in strings:
+            sequential.saveString(s)
+        
+        assert batch.loadStrings() == sequential.loadStrings()
+    
+    def it_preserves_existing_strings_when_appending(db_factory):
         """Should not modify existing strings when appending new one"""
-        db = MyDB(clean_db)
-        db.saveStrings(["one", "two"])
+        db = db_factory(["one", "two"])
         db.saveString("three")
         
         result = db.loadStrings()
@@ -200,37 +244,3 @@ def describe_MyDB_saveString():
         assert "two" in result
         assert "three" in result
         assert len(result) == 3
-    
-    def it_allows_duplicate_strings(clean_db):
-        """Should allow saving duplicate strings"""
-        db = MyDB(clean_db)
-        db.saveString("duplicate")
-        db.saveString("duplicate")
-        
-        result = db.loadStrings()
-        assert result == ["duplicate", "duplicate"]
-    
-    def it_handles_empty_string(clean_db):
-        """Should successfully save empty string"""
-        db = MyDB(clean_db)
-        db.saveString("")
-        
-        result = db.loadStrings()
-        assert result == [""]
-    
-    def it_handles_unicode_strings(clean_db):
-        """Should handle unicode characters"""
-        db = MyDB(clean_db)
-        db.saveString("Hello 世界 🌍")
-        
-        result = db.loadStrings()
-        assert result == ["Hello 世界 🌍"]
-    
-    def it_persists_appended_string_across_instances(clean_db):
-        """Should persist appended string for new instance"""
-        db1 = MyDB(clean_db)
-        db1.saveString("persistent")
-        
-        db2 = MyDB(clean_db)
-        result = db2.loadStrings()
-        assert "persistent" in result
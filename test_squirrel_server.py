@@ -1,154 +1,109 @@
+import functools
 import os
-import shutil
-import subprocess
-import time
-import json
-import requests
+import select
 import socket
+import sqlite3
+import subprocess
+import sys
+import urllib.parse
+import pytest
 from pytest import fixture
 
-# Server configuration
-DB_FILE = "squirrel_db.db"
-TEMPLATE_DB_FILE = "empty_squirrel_db.db"
-
-
-def find_free_port():
-    """Find an available port to use for the test server"""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(('', 0))
-        s.listen(1)
-        port = s.getsockname()[1]
-    return port
-
-
-@fixture(scope="session")
-def server():
-    """Start server once for all tests on a free port"""
-    workspace_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Find a free port
-    port = find_free_port()
-    server_url = f"http://127.0.0.1:{port}"
-    
-    # Find Python executable
-    import sys
-    python_executable = sys.executable
-    
-    # Create a temporary modified server file with the new port
-    with open(os.path.join(workspace_dir, "squirrel_server.py"), "r") as f:
-        server_code = f.read()
-    
-    # Replace the port in the server code
-    modified_code = server_code.replace(
-        'listen = ("127.0.0.1", 8080)',
-        f'listen = ("127.0.0.1", {port})'
-    )
-    
-    temp_server_file = os.path.join(workspace_dir, "test_squirrel_server_temp.py")
-    with open(temp_server_file, "w") as f:
-        f.write(modified_code)
-    
-    # Start the server on the free port
-    server_process = subprocess.Popen(
-        [python_executable, temp_server_file],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-        cwd=workspace_dir
-    )
-    
-    # Wait for server to start
-    max_retries = 30
-    server_started = False
-    for i in range(max_retries):
-        try:
-            response = requests.get(f"{server_url}/squirrels", timeout=1)
-            server_started = True
-            break
-        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
-            time.sleep(0.3)
-    
-    if not server_started:
-        server_process.kill()
-        if os.path.exists(temp_server_file):
-            os.remove(temp_server_file)
-        raise Exception("Server failed to start")
-    
-    yield (server_process, server_url)
-    
-    # Cleanup
-    server_process.terminate()
-    try:
-        server_process.wait(timeout=5)
-    except subprocess.TimeoutExpired:
-        server_process.kill()
-    
-    # Remove temporary server file
-    if os.path.exists(temp_server_file):
-        os.remove(temp_server_file)
+pytestmark = pytest.mark.usefixtures("reset_database")
+
+
+SQUIRRELS_PATH = "/squirrels"
+
+
+@functools.cache
+def squirrel_path(squirrelId):
+    """Path of a single squirrel resource"""
+    return f"{SQUIRRELS_PATH}/{squirrelId}"
+
+
+@functools.cache
+def form_body(name, size):
+    """Form-encoded create/update body, encoded once per name and size"""
+    return urllib.parse.urlencode({"name": name, "size": size}).encode()
+
+
+def post_squirrel(client, name, size):
+    """Create a squirrel through the API"""
+    return client.post(SQUIRRELS_PATH, data=form_body(name, size))
+
+
+@fixture(scope="module")
+def client(http):
+    """HTTP client tests use to talk to the server, taking paths like /squirrels"""
+    return http
 
 
 @fixture
-def reset_database(server):
-    """Reset database to clean state before each test"""
-    server_process, server_url = server
-    workspace_dir = os.path.dirname(os.path.abspath(__file__))
-    db_path = os.path.join(workspace_dir, DB_FILE)
-    template_path = os.path.join(workspace_dir, TEMPLATE_DB_FILE)
-    
-    # Copy template database
-    if os.path.exists(db_path):
-        os.remove(db_path)
-    shutil.copy(template_path, db_path)
-    
-    # Small delay to ensure file system sync
-    time.sleep(0.15)
-    
-    yield server_url
-    
-    # Cleanup after test (optional, but ensures clean state)
-    time.sleep(0.1)
+def clean_database(reset_database, empty_database):
+    """Reset database to clean state for tests that need it empty"""
+    empty_database()
 
 
-def describe_GET_squirrels_list():
+@fixture
+def seed_squirrels(reset_database, db_connection):
+    """Function that inserts (name, size) rows directly, skipping the API"""
+    def seed(rows):
+        db_connection.executemany("INSERT INTO squirrels (name, size) VALUES (?, ?)", rows)
+        db_connection.commit()
+    return seed
+
+
+@fixture
+def base_id(reset_database, client):
+    """Id the next created squirrel will be assigned"""
+    # squirrels.id is a plain INTEGER PRIMARY KEY, so SQLite hands out
+    # max(id) + 1
+    squirrels = client.get(SQUIRRELS_PATH).json()
+    if squirrels:
+        return max(s["id"] for s in squirrels) + 1
+    return 1
+
+
+class TestGETSquirrelsList:
     """Test suite for GET /squirrels - List all squirrels"""
     
-    def it_returns_200_status_code(reset_database):
-        """Should return 200 OK status"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/squirrels")
+    def test_keeps_connection_open_between_requests(self, client):
+        """Should answer consecutive requests over the same connection"""
+        client.get(SQUIRRELS_PATH)
+        sock = client.connection.sock
+        client.get(SQUIRRELS_PATH)
+        
+        assert sock is not None
+        assert client.connection.sock is sock
+    
+    def test_serves_other_clients_while_a_connection_stays_open(self, SquirrelClientClass, server, client):
+        """Should answer a second client while another keeps its connection idle"""
+        client.get(SQUIRRELS_PATH)
+        other = SquirrelClientClass("127.0.0.1", server.server_address[1])
+        response = other.get(SQUIRRELS_PATH)
+        other.close()
         assert response.status_code == 200
     
-    def it_returns_json_content_type(reset_database):
-        """Should return application/json content type"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/squirrels")
+    def test_returns_ok_json_empty_list(self, clean_database, client):
+        """Should return 200 with a JSON empty array when database is empty"""
+        response = client.get(SQUIRRELS_PATH)
+        assert response.status_code == 200
         assert response.headers["Content-Type"] == "application/json"
+        assert response.json() == []
     
-    def it_returns_empty_array_when_no_squirrels(reset_database):
-        """Should return empty array when database is empty"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/squirrels")
-        data = response.json()
-        assert isinstance(data, list)
-        assert len(data) == 0
-    
-    def it_returns_array_of_squirrels_after_creation(reset_database):
+    def test_returns_array_of_squirrels_after_creation(self, clean_database, client, seed_squirrels):
         """Should return all created squirrels"""
-        server_url = reset_database
-        # Create squirrels
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Tiny", "size": "small"})
+        seed_squirrels([("Fluffy", "large"), ("Tiny", "small")])
         
-        response = requests.get(f"{server_url}/squirrels")
+        response = client.get(SQUIRRELS_PATH)
         data = response.json()
         assert len(data) == 2
     
-    def it_returns_squirrels_with_all_fields(reset_database):
+    def test_returns_squirrels_with_all_fields(self, clean_database, client):
         """Should return squirrels with id, name, and size fields"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
+        post_squirrel(client, "Fluffy", "large")
         
-        response = requests.get(f"{server_url}/squirrels")
+        response = client.get(SQUIRRELS_PATH)
         data = response.json()
         squirrel = data[0]
         
@@ -158,14 +113,11 @@ def describe_GET_squirrels_list():
         assert squirrel["name"] == "Fluffy"
         assert squirrel["size"] == "large"
     
-    def it_returns_squirrels_ordered_by_id(reset_database):
+    def test_returns_squirrels_ordered_by_id(self, clean_database, client, seed_squirrels):
         """Should return squirrels sorted by id"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "First", "size": "small"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Second", "size": "medium"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Third", "size": "large"})
+        seed_squirrels([("First", "small"), ("Second", "medium"), ("Third", "large")])
         
-        response = requests.get(f"{server_url}/squirrels")
+        response = client.get(SQUIRRELS_PATH)
         data = response.json()
         
         assert data[0]["name"] == "First"
@@ -173,470 +125,477 @@ def describe_GET_squirrels_list():
         assert data[2]["name"] == "Third"
 
 
-def describe_GET_squirrels_retrieve():
+class TestGETSquirrelsRetrieve:
     """Test suite for GET /squirrels/{id} - Retrieve single squirrel"""
     
-    def it_returns_200_status_code_for_existing_squirrel(reset_database):
+    def test_returns_200_status_code_for_existing_squirrel(self, base_id, client):
         """Should return 200 OK for existing squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
+        post_squirrel(client, "Fluffy", "large")
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         assert response.status_code == 200
     
-    def it_returns_json_content_type_for_existing_squirrel(reset_database):
+    def test_returns_json_content_type_for_existing_squirrel(self, base_id, client):
         """Should return application/json content type"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
+        post_squirrel(client, "Fluffy", "large")
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         assert response.headers["Content-Type"] == "application/json"
     
-    def it_returns_correct_squirrel_data(reset_database):
+    def test_returns_correct_squirrel_data(self, base_id, client):
         """Should return correct squirrel object"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
+        post_squirrel(client, "Fluffy", "large")
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
         
-        assert data["id"] == 1
+        assert data["id"] == base_id
         assert data["name"] == "Fluffy"
         assert data["size"] == "large"
     
-    def it_returns_correct_squirrel_when_multiple_exist(reset_database):
+    def test_returns_correct_squirrel_when_multiple_exist(self, base_id, client, seed_squirrels):
         """Should return the specific requested squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "First", "size": "small"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Second", "size": "large"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Third", "size": "medium"})
+        seed_squirrels([("First", "small"), ("Second", "large"), ("Third", "medium")])
         
-        response = requests.get(f"{server_url}/squirrels/2")
+        response = client.get(squirrel_path(base_id + 1))
         data = response.json()
         
-        assert data["id"] == 2
+        assert data["id"] == base_id + 1
         assert data["name"] == "Second"
         assert data["size"] == "large"
     
-    def it_returns_404_for_nonexistent_squirrel(reset_database):
-        """Should return 404 when squirrel doesn't exist"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/squirrels/999")
+    def test_returns_404_for_nonexistent_squirrel(self, client):
+        """Should return a text/plain '404 Not Found' when squirrel doesn't exist"""
+        response = client.get(squirrel_path(999))
         assert response.status_code == 404
-    
-    def it_returns_text_plain_content_type_for_404(reset_database):
-        """Should return text/plain for 404 response"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/squirrels/999")
         assert response.headers["Content-Type"] == "text/plain"
-    
-    def it_returns_404_message_for_nonexistent_squirrel(reset_database):
-        """Should return '404 Not Found' message"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/squirrels/999")
         assert response.text == "404 Not Found"
 
 
-def describe_POST_squirrels_create():
+class TestPOSTSquirrelsCreate:
     """Test suite for POST /squirrels - Create new squirrel"""
     
-    def it_returns_201_status_code(reset_database):
+    def test_returns_201_status_code(self, client):
         """Should return 201 Created status"""
-        server_url = reset_database
-        response = requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
+        response = post_squirrel(client, "Fluffy", "large")
         assert response.status_code == 201
     
-    def it_creates_squirrel_in_database(reset_database):
+    def test_creates_squirrel_in_database(self, clean_database, client):
         """Should persist squirrel in database"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
+        post_squirrel(client, "Fluffy", "large")
         
         # Verify by retrieving
-        response = requests.get(f"{server_url}/squirrels")
+        response = client.get(SQUIRRELS_PATH)
         data = response.json()
         assert len(data) == 1
         assert data[0]["name"] == "Fluffy"
     
-    def it_creates_squirrel_with_correct_name(reset_database):
+    def test_creates_squirrel_with_correct_name(self, base_id, client):
         """Should save squirrel with provided name"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "TestName", "size": "medium"})
+        post_squirrel(client, "TestName", "medium")
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
         assert data["name"] == "TestName"
     
-    def it_creates_squirrel_with_correct_size(reset_database):
+    def test_creates_squirrel_with_correct_size(self, base_id, client):
         """Should save squirrel with provided size"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "extra-large"})
+        post_squirrel(client, "Fluffy", "extra-large")
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
         assert data["size"] == "extra-large"
     
-    def it_assigns_id_to_created_squirrel(reset_database):
+    def test_assigns_id_to_created_squirrel(self, base_id, client):
         """Should assign an id to new squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "large"})
+        post_squirrel(client, "Fluffy", "large")
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
-        assert data["id"] == 1
+        assert data["id"] == base_id
     
-    def it_creates_multiple_squirrels_with_unique_ids(reset_database):
+    def test_creates_multiple_squirrels_with_unique_ids(self, clean_database, client):
         """Should assign unique ids to multiple squirrels"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "First", "size": "small"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Second", "size": "large"})
+        post_squirrel(client, "First", "small")
+        post_squirrel(client, "Second", "large")
         
-        response = requests.get(f"{server_url}/squirrels")
+        response = client.get(SQUIRRELS_PATH)
         data = response.json()
         assert data[0]["id"] == 1
         assert data[1]["id"] == 2
     
-    def it_creates_squirrel_retrievable_by_id(reset_database):
+    def test_creates_squirrel_retrievable_by_id(self, base_id, client):
         """Should create squirrel that can be retrieved by id"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Retrievable", "size": "medium"})
+        post_squirrel(client, "Retrievable", "medium")
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         assert response.status_code == 200
         data = response.json()
         assert data["name"] == "Retrievable"
     
-    def it_rejects_squirrel_with_empty_size(reset_database):
+    def test_rejects_squirrel_with_empty_size(self, client):
         """Should not allow creating squirrel with empty size"""
-        server_url = reset_database
-        response = requests.post(f"{server_url}/squirrels", data={"name": "TestSquirrel", "size": ""})
+        response = post_squirrel(client, "TestSquirrel", "")
         
         assert response.status_code == 400
     
-    def it_rejects_squirrel_with_missing_size(reset_database):
+    def test_rejects_squirrel_with_missing_size(self, client):
         """Should return 400 when size field is missing"""
-        server_url = reset_database
-        response = requests.post(f"{server_url}/squirrels", data={"name": "TestSquirrel"})
+        response = client.post(SQUIRRELS_PATH, data={"name": "TestSquirrel"})
         
         assert response.status_code == 400
     
-    def it_rejects_squirrel_with_missing_name(reset_database):
+    def test_rejects_squirrel_with_missing_name(self, client):
         """Should return 400 when name field is missing"""
-        server_url = reset_database
-        response = requests.post(f"{server_url}/squirrels", data={"size": "medium"})
+        response = client.post(SQUIRRELS_PATH, data={"size": "medium"})
+        
+        assert response.status_code == 400
+
+
+class TestPOSTSquirrelsBatchCreate:
+    """Test suite for POST /squirrels with a JSON array - Create many squirrels"""
+    
+    def test_returns_201_with_created_ids(self, base_id, client):
+        """Should return 201 Created and the new ids in request order"""
+        response = client.post(SQUIRRELS_PATH, json=[
+            {"name": "First", "size": "small"},
+            {"name": "Second", "size": "large"},
+        ])
+        
+        assert response.status_code == 201
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.json() == [base_id, base_id + 1]
+    
+    def test_creates_every_squirrel_in_batch(self, clean_database, client):
+        """Should persist all squirrels from the batch"""
+        client.post(SQUIRRELS_PATH, json=[
+            {"name": "First", "size": "small"},
+            {"name": "Second", "size": "large"},
+            {"name": "Third", "size": "medium"},
+        ])
+        
+        response = client.get(SQUIRRELS_PATH)
+        data = response.json()
+        assert [(s["name"], s["size"]) for s in data] == [
+            ("First", "small"), ("Second", "large"), ("Third", "medium"),
+        ]
+    
+    def test_accepts_empty_batch(self, client):
+        """Should return an empty id list for an empty batch"""
+        response = client.post(SQUIRRELS_PATH, json=[])
+        
+        assert response.status_code == 201
+        assert response.json() == []
+    
+    @pytest.mark.parametrize("body", [
+        b'[{"name": "Fluffy"',
+        b'\xff',
+        b'{"name": "Fluffy", "size": "large"}',
+        b'["Fluffy"]',
+        b'[{"name": "Fluffy"}]',
+        b'[{"size": "large"}]',
+        b'[{"name": "Fluffy", "size": {"cm": 30}}]',
+    ], ids=["malformed", "not_utf8", "object", "item_not_object", "item_without_size", "item_without_name", "size_not_string"])
+    def test_rejects_invalid_batch(self, clean_database, client, body):
+        """Should return 400 and create nothing for a body that isn't a list of squirrels"""
+        response = client.request("POST", SQUIRRELS_PATH, data=body, headers={"Content-Type": "application/json"})
         
         assert response.status_code == 400
+        assert response.text == "400 Bad Request"
+        assert client.get(SQUIRRELS_PATH).json() == []
 
 
-def describe_PUT_squirrels_update():
+class TestPUTSquirrelsUpdate:
     """Test suite for PUT /squirrels/{id} - Update squirrel"""
     
-    def it_returns_204_status_code_for_successful_update(reset_database):
+    def test_returns_204_status_code_for_successful_update(self, base_id, client):
         """Should return 204 No Content for successful update"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Original", "size": "small"})
+        post_squirrel(client, "Original", "small")
         
-        response = requests.put(f"{server_url}/squirrels/1", data={"name": "Updated", "size": "large"})
+        response = client.put(squirrel_path(base_id), data=form_body("Updated", "large"))
         assert response.status_code == 204
     
-    def it_updates_squirrel_name(reset_database):
+    def test_updates_squirrel_name(self, base_id, client):
         """Should update the squirrel's name"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Original", "size": "small"})
-        requests.put(f"{server_url}/squirrels/1", data={"name": "NewName", "size": "small"})
+        post_squirrel(client, "Original", "small")
+        client.put(squirrel_path(base_id), data=form_body("NewName", "small"))
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
         assert data["name"] == "NewName"
     
-    def it_updates_squirrel_size(reset_database):
+    def test_updates_squirrel_size(self, base_id, client):
         """Should update the squirrel's size"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Fluffy", "size": "small"})
-        requests.put(f"{server_url}/squirrels/1", data={"name": "Fluffy", "size": "huge"})
+        post_squirrel(client, "Fluffy", "small")
+        client.put(squirrel_path(base_id), data=form_body("Fluffy", "huge"))
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
         assert data["size"] == "huge"
     
-    def it_updates_both_name_and_size(reset_database):
+    def test_updates_both_name_and_size(self, base_id, client):
         """Should update both name and size together"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Original", "size": "small"})
-        requests.put(f"{server_url}/squirrels/1", data={"name": "Changed", "size": "enormous"})
+        post_squirrel(client, "Original", "small")
+        client.put(squirrel_path(base_id), data=form_body("Changed", "enormous"))
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
         assert data["name"] == "Changed"
         assert data["size"] == "enormous"
     
-    def it_preserves_squirrel_id_after_update(reset_database):
+    def test_preserves_squirrel_id_after_update(self, base_id, client):
         """Should not change the squirrel's id"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Original", "size": "small"})
-        requests.put(f"{server_url}/squirrels/1", data={"name": "Updated", "size": "large"})
+        post_squirrel(client, "Original", "small")
+        client.put(squirrel_path(base_id), data=form_body("Updated", "large"))
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         data = response.json()
-        assert data["id"] == 1
+        assert data["id"] == base_id
     
-    def it_updates_correct_squirrel_when_multiple_exist(reset_database):
+    def test_updates_correct_squirrel_when_multiple_exist(self, base_id, client, seed_squirrels):
         """Should update only the specified squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "First", "size": "small"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Second", "size": "medium"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Third", "size": "large"})
+        seed_squirrels([("First", "small"), ("Second", "medium"), ("Third", "large")])
         
-        requests.put(f"{server_url}/squirrels/2", data={"name": "Modified", "size": "huge"})
+        client.put(squirrel_path(base_id + 1), data=form_body("Modified", "huge"))
         
-        # Verify correct squirrel updated
-        response = requests.get(f"{server_url}/squirrels/2")
-        data = response.json()
-        assert data["name"] == "Modified"
-        
-        # Verify others unchanged
-        response1 = requests.get(f"{server_url}/squirrels/1")
-        assert response1.json()["name"] == "First"
-        response3 = requests.get(f"{server_url}/squirrels/3")
-        assert response3.json()["name"] == "Third"
-    
-    def it_returns_404_for_nonexistent_squirrel(reset_database):
-        """Should return 404 when updating nonexistent squirrel"""
-        server_url = reset_database
-        response = requests.put(f"{server_url}/squirrels/999", data={"name": "Ghost", "size": "none"})
-        assert response.status_code == 404
+        # Verify correct squirrel updated and others unchanged in one list call
+        names = {s["id"]: s["name"] for s in client.get(SQUIRRELS_PATH).json()}
+        assert names[base_id + 1] == "Modified"
+        assert names[base_id] == "First"
+        assert names[base_id + 2] == "Third"
     
-    def it_returns_404_message_when_updating_nonexistent_squirrel(reset_database):
-        """Should return '404 Not Found' message"""
-        server_url = reset_database
-        response = requests.put(f"{server_url}/squirrels/999", data={"name": "Ghost", "size": "none"})
+    def test_returns_404_for_nonexistent_squirrel(self, client):
+        """Should return '404 Not Found' when updating nonexistent squirrel"""
+        response = client.put(squirrel_path(999), data=form_body("Ghost", "none"))
+        assert response.status_code == 404
         assert response.text == "404 Not Found"
 
 
-def describe_DELETE_squirrels():
+class TestDELETESquirrels:
     """Test suite for DELETE /squirrels/{id} - Delete squirrel"""
     
-    def it_returns_204_status_code_for_successful_deletion(reset_database):
+    def test_returns_204_status_code_for_successful_deletion(self, base_id, client):
         """Should return 204 No Content for successful deletion"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "ToDelete", "size": "small"})
+        post_squirrel(client, "ToDelete", "small")
         
-        response = requests.delete(f"{server_url}/squirrels/1")
+        response = client.delete(squirrel_path(base_id))
         assert response.status_code == 204
     
-    def it_removes_squirrel_from_database(reset_database):
+    def test_removes_squirrel_from_database(self, clean_database, client):
         """Should remove squirrel so it's not in list"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "ToDelete", "size": "small"})
-        requests.delete(f"{server_url}/squirrels/1")
+        post_squirrel(client, "ToDelete", "small")
+        client.delete(squirrel_path(1))
         
-        response = requests.get(f"{server_url}/squirrels")
+        response = client.get(SQUIRRELS_PATH)
         data = response.json()
         assert len(data) == 0
     
-    def it_makes_squirrel_unretrievable_after_deletion(reset_database):
+    def test_makes_squirrel_unretrievable_after_deletion(self, base_id, client):
         """Should return 404 when retrieving deleted squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "ToDelete", "size": "small"})
-        requests.delete(f"{server_url}/squirrels/1")
+        post_squirrel(client, "ToDelete", "small")
+        client.delete(squirrel_path(base_id))
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         assert response.status_code == 404
     
-    def it_deletes_correct_squirrel_when_multiple_exist(reset_database):
+    def test_deletes_correct_squirrel_when_multiple_exist(self, base_id, client, seed_squirrels):
         """Should delete only the specified squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Keep1", "size": "small"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Delete", "size": "medium"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Keep2", "size": "large"})
+        seed_squirrels([("Keep1", "small"), ("Delete", "medium"), ("Keep2", "large")])
         
-        requests.delete(f"{server_url}/squirrels/2")
+        client.delete(squirrel_path(base_id + 1))
         
-        # Verify correct one deleted
-        response = requests.get(f"{server_url}/squirrels/2")
-        assert response.status_code == 404
-        
-        # Verify others remain
-        response1 = requests.get(f"{server_url}/squirrels/1")
-        assert response1.status_code == 200
-        response3 = requests.get(f"{server_url}/squirrels/3")
-        assert response3.status_code == 200
+        # Verify correct one deleted and others remain in one list call
+        ids = {s["id"] for s in client.get(SQUIRRELS_PATH).json()}
+        assert base_id + 1 not in ids
+        assert base_id in ids
+        assert base_id + 2 in ids
     
-    def it_reduces_list_count_after_deletion(reset_database):
+    def test_reduces_list_count_after_deletion(self, clean_database, client, seed_squirrels):
         """Should reduce total count in list endpoint"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "One", "size": "small"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Two", "size": "medium"})
-        requests.post(f"{server_url}/squirrels", data={"name": "Three", "size": "large"})
+        seed_squirrels([("One", "small"), ("Two", "medium"), ("Three", "large")])
         
-        requests.delete(f"{server_url}/squirrels/2")
+        client.delete(squirrel_path(2))
         
-        response = requests.get(f"{server_url}/squirrels")
+        response = client.get(SQUIRRELS_PATH)
         data = response.json()
         assert len(data) == 2
     
-    def it_returns_404_for_nonexistent_squirrel(reset_database):
-        """Should return 404 when deleting nonexistent squirrel"""
-        server_url = reset_database
-        response = requests.delete(f"{server_url}/squirrels/999")
+    def test_returns_404_for_nonexistent_squirrel(self, client):
+        """Should return '404 Not Found' when deleting nonexistent squirrel"""
+        response = client.delete(squirrel_path(999))
         assert response.status_code == 404
-    
-    def it_returns_404_message_when_deleting_nonexistent_squirrel(reset_database):
-        """Should return '404 Not Found' message"""
-        server_url = reset_database
-        response = requests.delete(f"{server_url}/squirrels/999")
         assert response.text == "404 Not Found"
 
 
-def describe_failure_conditions():
+class TestFailureConditions:
     """Test suite for various failure scenarios (404 responses)"""
     
-    def it_returns_404_for_invalid_resource_name_on_GET(reset_database):
-        """Should return 404 for GET on unknown resource"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/invalid")
-        assert response.status_code == 404
-    
-    def it_returns_404_for_invalid_resource_name_on_POST(reset_database):
-        """Should return 404 for POST on unknown resource"""
-        server_url = reset_database
-        response = requests.post(f"{server_url}/invalid", data={"name": "test", "size": "small"})
-        assert response.status_code == 404
-    
-    def it_returns_404_for_invalid_resource_name_on_PUT(reset_database):
-        """Should return 404 for PUT on unknown resource"""
-        server_url = reset_database
-        response = requests.put(f"{server_url}/invalid/1", data={"name": "test", "size": "small"})
-        assert response.status_code == 404
-    
-    def it_returns_404_for_invalid_resource_name_on_DELETE(reset_database):
-        """Should return 404 for DELETE on unknown resource"""
-        server_url = reset_database
-        response = requests.delete(f"{server_url}/invalid/1")
-        assert response.status_code == 404
-    
-    def it_returns_404_for_POST_with_id_parameter(reset_database):
-        """Should return 404 for POST /squirrels/{id}"""
-        server_url = reset_database
-        response = requests.post(f"{server_url}/squirrels/1", data={"name": "test", "size": "small"})
+    @pytest.mark.parametrize("method, path", [
+        ("GET", "/invalid"),
+        ("POST", "/invalid"),
+        ("PUT", "/invalid/1"),
+        ("DELETE", "/invalid/1"),
+        ("POST", "/squirrels/1"),
+        ("PUT", "/squirrels"),
+        ("DELETE", "/squirrels"),
+        ("GET", "/"),
+        ("GET", "/squirrels/999/extra/path"),
+    ])
+    def test_returns_404_for_unroutable_requests(self, client, method, path):
+        """Should return 404 for unknown resources, misplaced ids and paths under a missing squirrel"""
+        # Only POST and PUT carry a body, as real clients for those routes would
+        data = form_body("test", "small") if method in ("POST", "PUT") else None
+        response = client.request(method, path, data=data)
         assert response.status_code == 404
     
-    def it_returns_404_for_PUT_without_id_parameter(reset_database):
-        """Should return 404 for PUT /squirrels without id"""
-        server_url = reset_database
-        response = requests.put(f"{server_url}/squirrels", data={"name": "test", "size": "small"})
-        assert response.status_code == 404
-    
-    def it_returns_404_for_DELETE_without_id_parameter(reset_database):
-        """Should return 404 for DELETE /squirrels without id"""
-        server_url = reset_database
-        response = requests.delete(f"{server_url}/squirrels")
-        assert response.status_code == 404
-    
-    def it_returns_404_for_empty_path(reset_database):
-        """Should return 404 for root path"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/")
-        assert response.status_code == 404
-    
-    def it_returns_404_for_nested_invalid_paths(reset_database):
-        """Should return 404 for deeply nested invalid paths"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/squirrels/1/extra/path")
-        assert response.status_code == 404
+    @pytest.mark.parametrize("method, path, status", [
+        ("GET", SQUIRRELS_PATH, 200),
+        ("GET", squirrel_path(1), 200),
+        ("DELETE", squirrel_path(1), 204),
+    ])
+    def test_keeps_connection_usable_after_unexpected_body(self, clean_database, client, method, path, status):
+        """Should consume a body sent with GET or DELETE so the next request still parses"""
+        post_squirrel(client, "Fluffy", "large")
+        
+        response = client.request(method, path, data=form_body("test", "small"))
+        assert response.status_code == status
+        
+        response = client.get(SQUIRRELS_PATH)
+        assert response.status_code == 200
     
-    def it_returns_404_for_retrieve_after_deletion(reset_database):
+    def test_returns_404_for_retrieve_after_deletion(self, base_id, client):
         """Should return 404 when retrieving deleted squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Temporary", "size": "small"})
-        requests.delete(f"{server_url}/squirrels/1")
+        post_squirrel(client, "Temporary", "small")
+        client.delete(squirrel_path(base_id))
         
-        response = requests.get(f"{server_url}/squirrels/1")
+        response = client.get(squirrel_path(base_id))
         assert response.status_code == 404
     
-    def it_returns_404_for_update_after_deletion(reset_database):
+    def test_returns_404_for_update_after_deletion(self, base_id, client):
         """Should return 404 when updating deleted squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Temporary", "size": "small"})
-        requests.delete(f"{server_url}/squirrels/1")
+        post_squirrel(client, "Temporary", "small")
+        client.delete(squirrel_path(base_id))
         
-        response = requests.put(f"{server_url}/squirrels/1", data={"name": "Ghost", "size": "none"})
+        response = client.put(squirrel_path(base_id), data=form_body("Ghost", "none"))
         assert response.status_code == 404
     
-    def it_returns_404_for_double_deletion(reset_database):
+    def test_returns_404_for_double_deletion(self, base_id, client):
         """Should return 404 when deleting already deleted squirrel"""
-        server_url = reset_database
-        requests.post(f"{server_url}/squirrels", data={"name": "Temporary", "size": "small"})
-        requests.delete(f"{server_url}/squirrels/1")
+        post_squirrel(client, "Temporary", "small")
+        client.delete(squirrel_path(base_id))
         
-        response = requests.delete(f"{server_url}/squirrels/1")
+        response = client.delete(squirrel_path(base_id))
         assert response.status_code == 404
     
-    def it_returns_404_with_text_plain_content_type(reset_database):
-        """Should return text/plain content type for all 404s"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/invalid")
+    def test_returns_consistent_plain_text_404(self, client):
+        """Should return a text/plain '404 Not Found' for unknown resources"""
+        response = client.get("/invalid")
         assert response.headers["Content-Type"] == "text/plain"
-    
-    def it_returns_404_message_text_for_all_failures(reset_database):
-        """Should return consistent '404 Not Found' message"""
-        server_url = reset_database
-        response = requests.get(f"{server_url}/invalid")
         assert response.text == "404 Not Found"
 
 
-def describe_integration_workflows():
+# Each step is (method, path, request kwargs, expected status, check on the
+# response or None); scenarios start from an empty table, so ids begin at 1
+CRUD_CYCLE = [
+    ("POST", SQUIRRELS_PATH, {"data": form_body("Lifecycle", "small")}, 201, None),
+    ("GET", squirrel_path(1), {}, 200, lambda r: r.json()["name"] == "Lifecycle"),
+    ("PUT", squirrel_path(1), {"data": form_body("Updated", "large")}, 204, None),
+    ("GET", squirrel_path(1), {}, 200, lambda r: r.json()["name"] == "Updated"),
+    ("DELETE", squirrel_path(1), {}, 204, None),
+    ("GET", squirrel_path(1), {}, 404, None),
+]
+
+DATA_CONSISTENCY = [
+    ("POST", SQUIRRELS_PATH, {"json": [
+        {"name": "A", "size": "small"},
+        {"name": "B", "size": "medium"},
+        {"name": "C", "size": "large"},
+    ]}, 201, lambda r: r.json() == [1, 2, 3]),
+    ("GET", SQUIRRELS_PATH, {}, 200, lambda r: len(r.json()) == 3),
+    ("DELETE", squirrel_path(2), {}, 204, None),
+    ("GET", SQUIRRELS_PATH, {}, 200, lambda r: [s["name"] for s in r.json()] == ["A", "C"]),
+]
+
+
+class TestIntegrationWorkflows:
     """Test suite for complete workflows combining multiple operations"""
     
-    def it_supports_complete_crud_cycle(reset_database):
-        """Should support create, read, update, delete workflow"""
-        server_url = reset_database
-        # Create
-        post_response = requests.post(f"{server_url}/squirrels", data={"name": "Lifecycle", "size": "small"})
-        assert post_response.status_code == 201
-        
-        # Read
-        get_response = requests.get(f"{server_url}/squirrels/1")
-        assert get_response.status_code == 200
-        assert get_response.json()["name"] == "Lifecycle"
-        
-        # Update
-        put_response = requests.put(f"{server_url}/squirrels/1", data={"name": "Updated", "size": "large"})
-        assert put_response.status_code == 204
-        
-        # Verify update
-        verify_response = requests.get(f"{server_url}/squirrels/1")
-        assert verify_response.json()["name"] == "Updated"
-        
-        # Delete
-        delete_response = requests.delete(f"{server_url}/squirrels/1")
-        assert delete_response.status_code == 204
-        
-        # Verify deletion
-        final_response = requests.get(f"{server_url}/squirrels/1")
-        assert final_response.status_code == 404
-    
-    def it_maintains_data_consistency_across_operations(reset_database):
-        """Should maintain consistent state through multiple operations"""
-        server_url = reset_database
-        # Create multiple squirrels
-        requests.post(f"{server_url}/squirrels", data={"name": "A", "size": "small"})
-        requests.post(f"{server_url}/squirrels", data={"name": "B", "size": "medium"})
-        requests.post(f"{server_url}/squirrels", data={"name": "C", "size": "large"})
-        
-        # Verify count
-        list_response = requests.get(f"{server_url}/squirrels")
-        assert len(list_response.json()) == 3
-        
-        # Delete middle one
-        requests.delete(f"{server_url}/squirrels/2")
-        
-        # Verify count updated
-        list_response2 = requests.get(f"{server_url}/squirrels")
-        assert len(list_response2.json()) == 2
-        
-        # Verify correct ones remain
-        remaining = list_response2.json()
-        names = [s["name"] for s in remaining]
-        assert "A" in names
-        assert "C" in names
-        assert "B" not in names
+    @pytest.mark.parametrize("steps", [CRUD_CYCLE, DATA_CONSISTENCY], ids=["crud_cycle", "data_consistency"])
+    def test_runs_scenario(self, clean_database, client, steps):
+        """Should give the expected status and state at every step of the workflow"""
+        for method, path, kwargs, status, check in steps:
+            response = client.request(method, path, **kwargs)
+            assert response.status_code == status, (method, path)
+            if check is not None:
+                assert check(response), (method, path)
+
+
+@fixture
+def startup_db(template_db, tmp_path):
+    """Empty database file for a squirrel_server.py started by the test"""
+    db_file = str(tmp_path / "startup.db")
+    db = sqlite3.connect(db_file)
+    template_db.backup(db)
+    db.close()
+    return db_file
+
+
+class TestServerStartup:
+    """Test suite for launching squirrel_server.py as a program"""
+    
+    def test_prints_ready_once_listening(self, SquirrelClientClass, server_script, startup_db):
+        """Should print READY as soon as it accepts connections"""
+        with subprocess.Popen(
+            [sys.executable, server_script, "--db", startup_db],
+            env={**os.environ, "SQUIRREL_PORT": "0"},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            # Unbuffered, so select() never misses lines already read ahead
+            bufsize=0
+        ) as server_process:
+            try:
+                # Read startup output until READY, remembering the bound port
+                port = None
+                while True:
+                    readable, _, _ = select.select([server_process.stdout], [], [], 5)
+                    assert readable, "Server did not print READY within 5 seconds"
+                    line = server_process.stdout.readline()
+                    assert line, "Server exited before printing READY"
+                    if line.startswith(b"squirrel_server running at"):
+                        port = int(line.rsplit(b":", 1)[1])
+                    if line.strip() == b"READY":
+                        break
+                
+                startup_client = SquirrelClientClass("127.0.0.1", port)
+                response = startup_client.get(SQUIRRELS_PATH)
+                startup_client.close()
+                assert response.status_code == 200
+            finally:
+                server_process.terminate()
+                server_process.wait(timeout=5)
+    
+    def test_serves_inherited_listening_socket(self, SquirrelClientClass, server_script, startup_db):
+        """Should accept connections on the socket passed in LISTEN_FD"""
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(128)
+        port = listener.getsockname()[1]
+        
+        server_process = subprocess.Popen(
+            [sys.executable, server_script, "--db", startup_db],
+            env={**os.environ, "LISTEN_FD": str(listener.fileno())},
+            pass_fds=(listener.fileno(),),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        # The child holds its own copy; connections queue on the shared
+        # socket until it starts accepting, so there is nothing to wait for
+        listener.close()
+        try:
+            startup_client = SquirrelClientClass("127.0.0.1", port)
+            response = startup_client.get(SQUIRRELS_PATH)
+            startup_client.close()
+            assert response.status_code == 200
+        finally:
+            server_process.terminate()
+            server_process.wait(timeout=5)